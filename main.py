@@ -7,27 +7,92 @@ import time
 import logging
 import threading
 import re
-import tempfile
+import io
 import os
+import queue
+import atexit
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional, Dict, List, Tuple
-from collections import defaultdict
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from bisect import bisect_left
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from requests_toolbelt import MultipartEncoder
+except ImportError:  # Optional: fall back to buffered multipart uploads
+    MultipartEncoder = None
+
+try:
+    import orjson
+except ImportError:  # Optional: fall back to the standard json module
+    orjson = None
 
 # Load environment variables
 load_dotenv()
 
-# Logging configuration
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('telegram_bale_forwarder.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+# Logging configuration (records are written by a background listener thread)
+log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+log_handlers = [
+    logging.FileHandler('telegram_bale_forwarder.log', encoding='utf-8'),
+    logging.StreamHandler()
+]
+for log_handler in log_handlers:
+    log_handler.setFormatter(log_formatter)
+
+log_queue = queue.Queue(-1)
+log_listener = QueueListener(log_queue, *log_handlers)
+log_listener.start()
+atexit.register(log_listener.stop)
+
+root_logger = logging.getLogger()
+root_logger.setLevel(logging.INFO)
+root_logger.addHandler(QueueHandler(log_queue))
 logger = logging.getLogger(__name__)
 
+# Message entity types converted to links
+_LINK_TYPES = frozenset(('text_link', 'url', 'mention'))
+
+# Zero-width characters stripped from outgoing text
+_ZW_TABLE = str.maketrans('', '', '\u200c\u200d\u200e\u200f\ufeff')
+
+# Characters outside the Basic Multilingual Plane (two UTF-16 code units each)
+_ASTRAL_RE = re.compile('[\U00010000-\U0010FFFF]')
+
+# Numeric Telegram chat IDs (ASCII digits only, optional leading minus)
+_NUMERIC_CHAT_ID_RE = re.compile(r'-?[0-9]+')
+
+# Precompiled text cleanup patterns
+_WS_RE = re.compile(r'[ \t]+')
+_MULTI_SPACE_RE = re.compile(r' {3,}')
+_PIPE_L = re.compile(r' +\|')
+_PIPE_R = re.compile(r'\| +')
+
+
+def _json_loads(data: bytes):
+    """Decode JSON payload, using orjson when available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj) -> str:
+    """Encode object as JSON string, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj)
+
+
+def _json_dumps_bytes(obj) -> bytes:
+    """Encode object as UTF-8 JSON bytes for request bodies, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
 
 class TelegramChannelBaleForwarder:
     def __init__(self):
@@ -45,24 +110,104 @@ class TelegramChannelBaleForwarder:
         self.telegram_base_url = f"https://api.telegram.org/bot{self.telegram_token}"
         self.bale_base_url = f"https://tapi.bale.ai/bot{self.bale_token}"
         
+        # Bale rate limiting (max concurrent requests and minimum spacing between sends)
+        self._bale_bucket = threading.BoundedSemaphore(25)
+        self._bale_rate_lock = threading.Lock()
+        self._last_bale_send = 0.0
+        self.bale_min_interval = 1 / 30
+        self.bale_max_attempts = 3
+        
+        # Persistent HTTP sessions (one keep-alive connection pool per API host)
+        self.tg_session = self._create_session()
+        # Long polling must not retry read timeouts, or a dead connection blocks for several timeouts
+        self.tg_poll_session = self._create_session(read_retries=0)
+        self.bale_session = self._create_session()
+        
         # Bot state
         self.last_update_id = 0
+        self._seen_updates = OrderedDict()  # Recently dispatched update IDs
+        self.seen_updates_limit = 10000
+        self.long_poll_timeout = 50
+        self._error_count = 0
         self.running = False
-        self.media_groups = defaultdict(list)
+        self.media_groups = {}
         self.media_group_timeout = 5
+        self._media_group_deadlines = {}  # group_id -> monotonic flush time
+        self._media_group_timers = {}  # group_id -> pending flush timer
+        self._media_group_lock = threading.Lock()
         self.source_channel_id = None  # Will be resolved from username
+        self.channel_id_cache_file = '.channel_id_cache'
+        
+        # Shared worker pool for message processing (avoids a new thread per update)
+        self._worker_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix='forwarder')
+        
+        # Separate pool for parallel photo downloads within a media group
+        self._download_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='downloader')
+        
+        # Cache of file_id -> (file_path, expiry) to skip repeated getFile calls
+        self._file_path_cache = OrderedDict()
+        self._file_path_lock = threading.Lock()
+        self.file_path_cache_size = 512
+        self.file_path_ttl = 3000
+
+    def _create_session(self, read_retries: Optional[int] = None) -> requests.Session:
+        """Create HTTP session with connection pooling and retries on transient errors"""
+        session = requests.Session()
+        retries = Retry(
+            total=3,
+            read=read_retries,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retries)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def _load_cached_channel_id(self) -> Optional[int]:
+        """Load previously resolved chat ID for the configured source channel"""
+        try:
+            with open(self.channel_id_cache_file, 'rb') as f:
+                cache = _json_loads(f.read())
+            if cache.get('source_channel') == self.source_channel:
+                return cache.get('chat_id')
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable channel ID cache: {e}")
+        return None
+
+    def _save_cached_channel_id(self, chat_id: int):
+        """Persist resolved chat ID so restarts can skip the getChat call"""
+        try:
+            with open(self.channel_id_cache_file, 'wb') as f:
+                f.write(_json_dumps_bytes({'source_channel': self.source_channel, 'chat_id': chat_id}))
+        except Exception as e:
+            logger.warning(f"Could not write channel ID cache: {e}")
 
     def resolve_channel_id(self) -> Optional[int]:
         """Resolve channel username to chat ID"""
+        # Numeric chat IDs (e.g. private channels) need no lookup
+        if self.source_channel and _NUMERIC_CHAT_ID_RE.fullmatch(self.source_channel):
+            chat_id = int(self.source_channel)
+            logger.info(f"Source channel given as chat ID: {chat_id}")
+            return chat_id
+        
+        cached_chat_id = self._load_cached_channel_id()
+        if cached_chat_id:
+            logger.info(f"Source channel resolved from cache (ID: {cached_chat_id})")
+            return cached_chat_id
+        
         try:
-            response = requests.post(
+            response = self.tg_session.post(
                 f"{self.telegram_base_url}/getChat",
-                json={'chat_id': self.source_channel},
+                data=_json_dumps_bytes({'chat_id': self.source_channel}),
                 headers={'Content-Type': 'application/json'},
                 timeout=10
             )
             
-            result = response.json()
+            result = _json_loads(response.content)
             if result.get('ok'):
                 chat_info = result.get('result', {})
                 chat_id = chat_info.get('id')
@@ -70,6 +215,8 @@ class TelegramChannelBaleForwarder:
                 chat_type = chat_info.get('type', 'Unknown')
                 
                 logger.info(f"Source channel resolved: {chat_title} (ID: {chat_id}, Type: {chat_type})")
+                if chat_id:
+                    self._save_cached_channel_id(chat_id)
                 return chat_id
             else:
                 error_description = result.get('description', 'Unknown error')
@@ -80,23 +227,23 @@ class TelegramChannelBaleForwarder:
             logger.error(f"Error resolving channel ID: {e}")
             return None
 
-    def get_telegram_updates(self) -> List[Dict]:
-        """Get updates from Telegram bot API and filter for source channel"""
+    def get_telegram_updates(self) -> Optional[List[Dict]]:
+        """Get updates from Telegram bot API and filter for source channel (None on error)"""
         try:
             params = {
                 'offset': self.last_update_id + 1,
-                'timeout': 30,
+                'timeout': self.long_poll_timeout,
                 'limit': 100
             }
             
-            response = requests.get(
+            response = self.tg_poll_session.get(
                 f"{self.telegram_base_url}/getUpdates",
                 params=params,
-                timeout=35
+                timeout=self.long_poll_timeout + 5
             )
             response.raise_for_status()
             
-            data = response.json()
+            data = _json_loads(response.content)
             if data.get('ok') and data.get('result'):
                 # Filter updates to include both messages and channel posts from our source channel
                 filtered_updates = []
@@ -120,86 +267,120 @@ class TelegramChannelBaleForwarder:
                         if chat_id == self.source_channel_id:
                             filtered_updates.append(update)
                             logger.info(f"New {message_type} from source channel: {message.get('message_id')}")
-                        else:
+                        elif logger.isEnabledFor(logging.DEBUG):
                             logger.debug(f"Ignoring message from other chat: {chat_id}")
                 
+                # Acknowledge batches with nothing for us so they are not fetched again
+                if not filtered_updates:
+                    self.last_update_id = data['result'][-1]['update_id']
+                
                 return filtered_updates
             return []
             
         except Exception as e:
             logger.error(f"Error getting Telegram updates: {e}")
-            return []
+            return None
+
+    def _get_file_path(self, file_id: str) -> Optional[str]:
+        """Resolve Telegram file_id to download path, using the local cache when possible"""
+        now = time.monotonic()
+        with self._file_path_lock:
+            cached = self._file_path_cache.get(file_id)
+            if cached and cached[1] > now:
+                self._file_path_cache.move_to_end(file_id)
+                return cached[0]
+        
+        response = self.tg_session.get(
+            f"{self.telegram_base_url}/getFile",
+            params={'file_id': file_id},
+            timeout=30
+        )
+        response.raise_for_status()
+        
+        data = _json_loads(response.content)
+        if not data.get('ok'):
+            return None
+        
+        file_path = data['result']['file_path']
+        
+        # Telegram keeps download links valid for at least an hour
+        with self._file_path_lock:
+            self._file_path_cache[file_id] = (file_path, now + self.file_path_ttl)
+            self._file_path_cache.move_to_end(file_id)
+            while len(self._file_path_cache) > self.file_path_cache_size:
+                self._file_path_cache.popitem(last=False)
+        
+        return file_path
 
     def download_telegram_file(self, file_id: str) -> Optional[bytes]:
         """Download file from Telegram"""
         try:
-            response = requests.get(
-                f"{self.telegram_base_url}/getFile",
-                params={'file_id': file_id},
-                timeout=30
-            )
-            response.raise_for_status()
-            
-            data = response.json()
-            if not data.get('ok'):
+            file_path = self._get_file_path(file_id)
+            if not file_path:
                 return None
-                
-            file_path = data['result']['file_path']
+            
             file_url = f"https://api.telegram.org/file/bot{self.telegram_token}/{file_path}"
             
-            response = requests.get(file_url, timeout=60)
+            response = self.tg_session.get(file_url, timeout=60)
             response.raise_for_status()
             
             return response.content
             
         except Exception as e:
+            # Drop possibly stale cached path so the next attempt calls getFile again
+            with self._file_path_lock:
+                self._file_path_cache.pop(file_id, None)
             logger.error(f"Error downloading file: {e}")
             return None
 
-    def utf16_to_utf8_offset(self, text: str, utf16_offset: int) -> int:
-        """Convert UTF-16 offset to UTF-8 offset for proper text extraction"""
-        try:
-            utf16_encoded = text.encode('utf-16le')
-            byte_offset = utf16_offset * 2
-            
-            if byte_offset > len(utf16_encoded):
-                return len(text)
-            
-            utf16_substring = utf16_encoded[:byte_offset]
-            utf8_substring = utf16_substring.decode('utf-16le', errors='ignore')
-            
-            return len(utf8_substring)
-        except:
-            return min(utf16_offset, len(text))
+    def _build_utf16_map(self, text: str) -> List[int]:
+        """Build sorted UTF-16 start offsets of non-BMP characters for offset conversion"""
+        # Non-BMP characters (emoji etc.) take two UTF-16 code units but one str index;
+        # the k-th one starts at UTF-16 offset (str index + k)
+        return [match.start() + k for k, match in enumerate(_ASTRAL_RE.finditer(text))]
 
     def extract_links_from_entities(self, text: str, entities: List[Dict]) -> List[Tuple[str, str]]:
         """Extract all text links with proper UTF-16 to UTF-8 conversion"""
         links = []
         
-        # Filter and sort link entities
-        link_entities = [e for e in entities if e['type'] in ['text_link', 'url', 'mention']]
-        link_entities.sort(key=lambda x: x['offset'])
+        # UTF-16 offsets equal string indices unless the text has non-BMP characters
+        bmp_only = text.isascii() or _ASTRAL_RE.search(text) is None
+        
+        # Build UTF-16 offset table once for all entities (only needed for non-BMP text)
+        utf16_map = None if bmp_only else self._build_utf16_map(text)
+        text_length = len(text)
         
-        for entity in link_entities:
+        # Telegram sends entities ordered by offset, so no sorting is needed
+        for entity in entities:
+            entity_type = entity['type']
+            if entity_type not in _LINK_TYPES:
+                continue
+            
             utf16_start = entity['offset']
             utf16_length = entity['length']
             
-            # Convert UTF-16 offsets to UTF-8
-            utf8_start = self.utf16_to_utf8_offset(text, utf16_start)
-            utf8_end = self.utf16_to_utf8_offset(text, utf16_start + utf16_length)
+            # Convert UTF-16 offsets to string indices
+            if bmp_only:
+                utf8_start = utf16_start
+                utf8_end = utf16_start + utf16_length
+            else:
+                # Subtract the non-BMP characters starting before each offset
+                utf16_end = utf16_start + utf16_length
+                utf8_start = min(utf16_start - bisect_left(utf16_map, utf16_start), text_length)
+                utf8_end = min(utf16_end - bisect_left(utf16_map, utf16_end), text_length)
             
             # Extract text
             entity_text = text[utf8_start:utf8_end].strip()
             
             # Handle different entity types
-            if entity['type'] == 'text_link':
+            if entity_type == 'text_link':
                 url = entity.get('url', '')
                 if entity_text and url:
                     links.append((entity_text, url))
-            elif entity['type'] == 'url':
+            elif entity_type == 'url':
                 if entity_text:
                     links.append((entity_text, entity_text))
-            elif entity['type'] == 'mention':
+            elif entity_type == 'mention':
                 if entity_text.startswith('@'):
                     username = entity_text[1:]
                     url = f"https://t.me/{username}"
@@ -210,14 +391,14 @@ class TelegramChannelBaleForwarder:
     def clean_text_for_bale(self, text: str) -> str:
         """Clean text for Bale by removing problematic characters and formatting"""
         # Remove zero-width characters
-        clean_text = re.sub(r'[\u200c\u200d\u200e\u200f\ufeff]', '', text)
+        clean_text = text.translate(_ZW_TABLE)
         
         # Clean up whitespace while preserving structure
         lines = clean_text.split('\n')
         cleaned_lines = []
         
         for line in lines:
-            cleaned_line = re.sub(r'[ \t]+', ' ', line.strip())
+            cleaned_line = _WS_RE.sub(' ', line.strip())
             if cleaned_line:
                 cleaned_lines.append(cleaned_line)
             elif len(cleaned_lines) > 0 and cleaned_lines[-1]:
@@ -232,26 +413,49 @@ class TelegramChannelBaleForwarder:
         if not links:
             return clean_text
         
-        # Replace each link text in the clean text with markdown link
-        formatted_text = clean_text
+        # Queue markdown links per link text; each occurrence consumes the next one
+        # (spaces around markdown links avoid emoji conflicts)
+        link_map = {}
+        for link_text, link_url in links:
+            link_map.setdefault(link_text, []).append(f" [{link_text}]({link_url}) ")
+        
+        # Longest texts first in the alternation to avoid partial replacements
+        pattern = re.compile('|'.join(
+            re.escape(link_text) for link_text in sorted(link_map, key=len, reverse=True)
+        ))
         
-        # Sort links by text length (longest first) to avoid partial replacements
-        sorted_links = sorted(links, key=lambda x: len(x[0]), reverse=True)
+        def replace_link(match):
+            pending = link_map[match.group(0)]
+            return pending.pop(0) if pending else match.group(0)
         
-        for link_text, link_url in sorted_links:
-            if link_text in formatted_text:
-                # Add spaces around markdown link to avoid emoji conflicts
-                markdown_link = f" [{link_text}]({link_url}) "
-                # Replace first occurrence to avoid duplicates
-                formatted_text = formatted_text.replace(link_text, markdown_link, 1)
+        # Replace all link texts in a single pass over the clean text
+        formatted_text = pattern.sub(replace_link, clean_text)
         
         # Clean up excessive spaces
-        formatted_text = re.sub(r' {3,}', '  ', formatted_text)  # Max 2 spaces
-        formatted_text = re.sub(r' +\|', ' |', formatted_text)   # Clean | separators
-        formatted_text = re.sub(r'\| +', '| ', formatted_text)   # Clean | separators
+        formatted_text = _MULTI_SPACE_RE.sub('  ', formatted_text)  # Max 2 spaces
+        formatted_text = _PIPE_L.sub(' |', formatted_text)   # Clean | separators
+        formatted_text = _PIPE_R.sub('| ', formatted_text)   # Clean | separators
         
         return formatted_text
 
+    def prepare_text_for_bale(self, text: str, entities: List[Dict]) -> Tuple[str, str, int]:
+        """Return (markdown text, plain text fallback, link count) for a message, cached per text and links"""
+        link_entities = tuple(
+            (e['type'], e['offset'], e['length'], e.get('url', ''))
+            for e in entities if e['type'] in _LINK_TYPES
+        )
+        return self._format_cached(text, link_entities)
+
+    @lru_cache(maxsize=256)
+    def _format_cached(self, text: str, link_entities: Tuple[Tuple[str, int, int, str], ...]) -> Tuple[str, str, int]:
+        """Format message text once per (text, link entities) pair"""
+        entities = [
+            {'type': entity_type, 'offset': offset, 'length': length, 'url': url}
+            for entity_type, offset, length, url in link_entities
+        ]
+        links = self.extract_links_from_entities(text, entities)
+        return self.format_message_for_bale(text, links), self.clean_text_for_bale(text), len(links)
+
     def extract_inline_keyboard(self, reply_markup: Dict) -> Optional[Dict]:
         """Extract and convert Telegram inline keyboard to Bale format"""
         if not reply_markup or 'inline_keyboard' not in reply_markup:
@@ -262,14 +466,11 @@ class TelegramChannelBaleForwarder:
             bale_keyboard = []
             
             for row in telegram_keyboard:
-                bale_row = []
-                for button in row:
-                    if 'text' in button and 'url' in button:
-                        bale_button = {
-                            'text': button['text'],
-                            'url': button['url']
-                        }
-                        bale_row.append(bale_button)
+                # Keep only URL buttons; other button types are not forwarded
+                bale_row = [
+                    {'text': button['text'], 'url': button['url']}
+                    for button in row if 'text' in button and 'url' in button
+                ]
                 
                 if bale_row:  # Only add non-empty rows
                     bale_keyboard.append(bale_row)
@@ -282,7 +483,44 @@ class TelegramChannelBaleForwarder:
         
         return None
 
-    def send_to_bale(self, text: str, parse_mode: str = 'Markdown', reply_markup: Optional[Dict] = None) -> bool:
+    def _wait_for_bale_slot(self):
+        """Space out Bale requests to stay under the API rate limit"""
+        with self._bale_rate_lock:
+            now = time.monotonic()
+            wait_time = self._last_bale_send + self.bale_min_interval - now
+            if wait_time > 0:
+                time.sleep(wait_time)
+                now += wait_time
+            self._last_bale_send = now
+
+    def _post_to_bale(self, method: str, data: Dict, files: Optional[Dict] = None, timeout: int = 30) -> Dict:
+        """Call Bale API method with rate limiting and Too Many Requests handling"""
+        url = f"{self.bale_base_url}/{method}"
+        
+        for attempt in range(self.bale_max_attempts):
+            with self._bale_bucket:
+                self._wait_for_bale_slot()
+                if files:
+                    response = self._post_multipart(url, data, files, timeout)
+                else:
+                    response = self.bale_session.post(
+                        url,
+                        data=_json_dumps_bytes(data),
+                        headers={'Content-Type': 'application/json'},
+                        timeout=timeout
+                    )
+            
+            result = _json_loads(response.content)
+            if result.get('error_code') != 429 or attempt == self.bale_max_attempts - 1:
+                return result
+            
+            # Honor server-provided flood wait before retrying
+            retry_after = result.get('parameters', {}).get('retry_after', 1)
+            logger.warning(f"Bale rate limit hit, retrying {method} in {retry_after} seconds")
+            time.sleep(retry_after)
+
+    def send_to_bale(self, text: str, parse_mode: str = 'Markdown', reply_markup: Optional[Dict] = None,
+                     plain_text: Optional[str] = None) -> bool:
         """Send message to Bale with optional inline keyboard"""
         try:
             data = {
@@ -295,16 +533,7 @@ class TelegramChannelBaleForwarder:
             if reply_markup:
                 data['reply_markup'] = reply_markup
             
-            headers = {'Content-Type': 'application/json'}
-            
-            response = requests.post(
-                f"{self.bale_base_url}/sendMessage",
-                json=data,
-                headers=headers,
-                timeout=30
-            )
-            
-            result = response.json()
+            result = self._post_to_bale('sendMessage', data)
             success = result.get('ok', False)
             
             if not success:
@@ -315,13 +544,9 @@ class TelegramChannelBaleForwarder:
                 if 'parse' in error_description.lower() or 'markdown' in error_description.lower():
                     logger.info("Retrying without markdown parsing")
                     data['parse_mode'] = None
-                    response = requests.post(
-                        f"{self.bale_base_url}/sendMessage",
-                        json=data,
-                        headers=headers,
-                        timeout=30
-                    )
-                    result = response.json()
+                    if plain_text is not None:
+                        data['text'] = plain_text
+                    result = self._post_to_bale('sendMessage', data)
                     success = result.get('ok', False)
             
             return success
@@ -330,29 +555,40 @@ class TelegramChannelBaleForwarder:
             logger.error(f"Error sending to Bale: {e}")
             return False
 
-    def send_media_group_to_bale(self, photos: List[bytes], caption: str, reply_markup: Optional[Dict] = None) -> bool:
+    def _post_multipart(self, url: str, data: Dict, files: Dict, timeout: int = 60) -> requests.Response:
+        """POST multipart form to Bale, streaming the body when requests-toolbelt is available"""
+        if MultipartEncoder is None:
+            return self.bale_session.post(url, data=data, files=files, timeout=timeout)
+        
+        fields = {key: str(value) for key, value in data.items() if value is not None}
+        for name, (filename, content, content_type) in files.items():
+            fields[name] = (filename, io.BytesIO(content), content_type)
+        
+        encoder = MultipartEncoder(fields=fields)
+        return self.bale_session.post(
+            url,
+            data=encoder,
+            headers={'Content-Type': encoder.content_type},
+            timeout=timeout
+        )
+
+    def send_media_group_to_bale(self, photos: List[bytes], caption: str, reply_markup: Optional[Dict] = None,
+                                 plain_caption: Optional[str] = None) -> bool:
         """Send media to Bale with proper keyboard handling"""
         if not photos:
             return False
         
         # If there's only one photo or we need keyboard, send as single photo
         if len(photos) == 1 or reply_markup:
-            return self.send_single_photo_to_bale(photos[0], caption, reply_markup)
+            return self.send_single_photo_to_bale(photos[0], caption, reply_markup, plain_caption)
         
         # Multiple photos without keyboard - send as media group
-        temp_files = []
         try:
-            for i, photo_data in enumerate(photos):
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.jpg')
-                temp_file.write(photo_data)
-                temp_file.close()
-                temp_files.append(temp_file.name)
-            
             # Prepare media list
             media_list = []
             files = {}
             
-            for i, temp_file_path in enumerate(temp_files):
+            for i, photo_data in enumerate(photos):
                 media_item = {
                     'type': 'photo',
                     'media': f"attach://photo_{i+1}"
@@ -365,24 +601,16 @@ class TelegramChannelBaleForwarder:
                 
                 media_list.append(media_item)
                 
-                # Add file to files dict
-                with open(temp_file_path, 'rb') as f:
-                    files[f'photo_{i+1}'] = (f'photo_{i+1}.jpg', f.read())
+                # Attach photo bytes directly from memory
+                files[f'photo_{i+1}'] = (f'photo_{i+1}.jpg', photo_data, 'image/jpeg')
             
             # Send media group
             data = {
                 'chat_id': self.bale_chat_id,
-                'media': json.dumps(media_list)
+                'media': _json_dumps(media_list)
             }
             
-            response = requests.post(
-                f"{self.bale_base_url}/sendMediaGroup",
-                data=data,
-                files=files,
-                timeout=60
-            )
-            
-            result = response.json()
+            result = self._post_to_bale('sendMediaGroup', data, files, timeout=60)
             success = result.get('ok', False)
             
             if not success:
@@ -395,15 +623,11 @@ class TelegramChannelBaleForwarder:
                     for item in media_list:
                         if 'parse_mode' in item:
                             del item['parse_mode']
+                            if plain_caption is not None:
+                                item['caption'] = plain_caption
                     
-                    data['media'] = json.dumps(media_list)
-                    response = requests.post(
-                        f"{self.bale_base_url}/sendMediaGroup",
-                        data=data,
-                        files=files,
-                        timeout=60
-                    )
-                    result = response.json()
+                    data['media'] = _json_dumps(media_list)
+                    result = self._post_to_bale('sendMediaGroup', data, files, timeout=60)
                     success = result.get('ok', False)
             
             return success
@@ -411,23 +635,11 @@ class TelegramChannelBaleForwarder:
         except Exception as e:
             logger.error(f"Error sending media group to Bale: {e}")
             return False
-        finally:
-            # Clean up temporary files
-            for temp_file_path in temp_files:
-                try:
-                    os.unlink(temp_file_path)
-                except:
-                    pass
-
-    def send_single_photo_to_bale(self, photo_data: bytes, caption: str, reply_markup: Optional[Dict] = None) -> bool:
+
+    def send_single_photo_to_bale(self, photo_data: bytes, caption: str, reply_markup: Optional[Dict] = None,
+                                  plain_caption: Optional[str] = None) -> bool:
         """Send single photo to Bale with inline keyboard support"""
-        temp_file = None
         try:
-            # Create temporary file
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.jpg')
-            temp_file.write(photo_data)
-            temp_file.close()
-            
             # Prepare data
             data = {
                 'chat_id': self.bale_chat_id,
@@ -439,20 +651,12 @@ class TelegramChannelBaleForwarder:
             
             # Add inline keyboard if provided
             if reply_markup:
-                data['reply_markup'] = json.dumps(reply_markup)
+                data['reply_markup'] = _json_dumps(reply_markup)
             
-            # Send photo
-            with open(temp_file.name, 'rb') as f:
-                files = {'photo': ('photo.jpg', f.read())}
+            # Send photo bytes directly from memory
+            files = {'photo': ('photo.jpg', photo_data, 'image/jpeg')}
             
-            response = requests.post(
-                f"{self.bale_base_url}/sendPhoto",
-                data=data,
-                files=files,
-                timeout=60
-            )
-            
-            result = response.json()
+            result = self._post_to_bale('sendPhoto', data, files, timeout=60)
             success = result.get('ok', False)
             
             if not success:
@@ -463,16 +667,10 @@ class TelegramChannelBaleForwarder:
                 if caption and ('parse' in error_description.lower() or 'markdown' in error_description.lower()):
                     logger.info("Retrying photo with plain text caption")
                     data['parse_mode'] = None
-                    with open(temp_file.name, 'rb') as f:
-                        files = {'photo': ('photo.jpg', f.read())}
+                    if plain_caption is not None:
+                        data['caption'] = plain_caption
                     
-                    response = requests.post(
-                        f"{self.bale_base_url}/sendPhoto",
-                        data=data,
-                        files=files,
-                        timeout=60
-                    )
-                    result = response.json()
+                    result = self._post_to_bale('sendPhoto', data, files, timeout=60)
                     success = result.get('ok', False)
             
             return success
@@ -480,59 +678,64 @@ class TelegramChannelBaleForwarder:
         except Exception as e:
             logger.error(f"Error sending photo to Bale: {e}")
             return False
-        finally:
-            # Clean up temporary file
-            if temp_file:
-                try:
-                    os.unlink(temp_file.name)
-                except:
-                    pass
 
     def process_media_group(self, group_id: str):
         """Process media group messages"""
-        messages = self.media_groups.pop(group_id, [])
-        if not messages:
-            return
-        
-        logger.info(f"Processing media group with {len(messages)} items from channel")
-        
-        # Get caption, entities and reply_markup from first message
-        first_msg = messages[0]
-        caption = first_msg.get('caption', '')
-        entities = first_msg.get('caption_entities', [])
-        reply_markup = first_msg.get('reply_markup')
-        
-        # Download all photos
-        photos = []
-        for msg in messages:
-            if 'photo' in msg:
-                largest_photo = max(msg['photo'], key=lambda x: x.get('file_size', 0))
-                photo_data = self.download_telegram_file(largest_photo['file_id'])
-                if photo_data:
-                    photos.append(photo_data)
-        
-        if not photos:
-            logger.warning("No photos could be downloaded from media group")
-            return
-        
-        # Extract links and format caption
-        links = self.extract_links_from_entities(caption, entities)
-        formatted_caption = self.format_message_for_bale(caption, links)
-        
-        # Extract inline keyboard
-        bale_keyboard = self.extract_inline_keyboard(reply_markup) if reply_markup else None
-        
-        # Log activity
-        keyboard_info = f", {len(bale_keyboard['inline_keyboard'])} keyboard rows" if bale_keyboard else ""
-        logger.info(f"Forwarding media group: {len(photos)} photos, {len(links)} links{keyboard_info}")
-        
-        # Send to Bale
-        success = self.send_media_group_to_bale(photos, formatted_caption, bale_keyboard)
-        
-        if success:
-            logger.info("Media group forwarded successfully")
-        else:
-            logger.error("Failed to forward media group")
+        try:
+            with self._media_group_lock:
+                messages = self.media_groups.pop(group_id, [])
+                self._media_group_deadlines.pop(group_id, None)
+            if not messages:
+                return
+            
+            logger.info(f"Processing media group with {len(messages)} items from channel")
+            
+            # Get caption, entities and reply_markup from first message
+            first_msg = messages[0]
+            caption = first_msg.get('caption', '')
+            entities = first_msg.get('caption_entities', [])
+            reply_markup = first_msg.get('reply_markup')
+            
+            # Download all photos in parallel (map preserves album order)
+            file_ids = [
+                max(msg['photo'], key=lambda x: x.get('file_size', 0))['file_id']
+                for msg in messages if 'photo' in msg
+            ]
+            photos = [
+                photo_data
+                for photo_data in self._download_pool.map(self.download_telegram_file, file_ids)
+                if photo_data
+            ]
+            
+            if not photos:
+                logger.warning("No photos could be downloaded from media group")
+                return
+            
+            # Extract links and format caption
+            formatted_caption, plain_caption, link_count = self.prepare_text_for_bale(caption, entities)
+            
+            # Extract inline keyboard
+            bale_keyboard = self.extract_inline_keyboard(reply_markup) if reply_markup else None
+            
+            # Log activity
+            keyboard_info = f", {len(bale_keyboard['inline_keyboard'])} keyboard rows" if bale_keyboard else ""
+            logger.info(f"Forwarding media group: {len(photos)} photos, {link_count} links{keyboard_info}")
+            
+            # Send to Bale
+            success = self.send_media_group_to_bale(photos, formatted_caption, bale_keyboard, plain_caption)
+            
+            if success:
+                logger.info("Media group forwarded successfully")
+            else:
+                logger.error("Failed to forward media group")
+            
+        except Exception as e:
+            logger.error(f"Error processing media group: {e}")
+        finally:
+            # Drop the timer entry only once the flush is done, so shutdown also waits for running flushes
+            with self._media_group_lock:
+                if self._media_group_timers.get(group_id) is threading.current_thread():
+                    del self._media_group_timers[group_id]
 
     def process_single_message(self, message: Dict):
         """Process single message (text or photo)"""
@@ -544,18 +747,17 @@ class TelegramChannelBaleForwarder:
                 reply_markup = message.get('reply_markup')
                 
                 # Extract links and format
-                links = self.extract_links_from_entities(text, entities)
-                formatted_text = self.format_message_for_bale(text, links)
+                formatted_text, plain_text, link_count = self.prepare_text_for_bale(text, entities)
                 
                 # Extract inline keyboard
                 bale_keyboard = self.extract_inline_keyboard(reply_markup) if reply_markup else None
                 
                 # Log activity
                 keyboard_info = f", {len(bale_keyboard['inline_keyboard'])} keyboard rows" if bale_keyboard else ""
-                logger.info(f"Forwarding text message: {len(links)} links{keyboard_info}")
+                logger.info(f"Forwarding text message: {link_count} links{keyboard_info}")
                 
                 # Send to Bale
-                success = self.send_to_bale(formatted_text, reply_markup=bale_keyboard)
+                success = self.send_to_bale(formatted_text, reply_markup=bale_keyboard, plain_text=plain_text)
                 
                 if success:
                     logger.info("Text message forwarded successfully")
@@ -574,18 +776,17 @@ class TelegramChannelBaleForwarder:
                 
                 if photo_data:
                     # Extract links and format caption
-                    links = self.extract_links_from_entities(caption, entities)
-                    formatted_caption = self.format_message_for_bale(caption, links)
+                    formatted_caption, plain_caption, link_count = self.prepare_text_for_bale(caption, entities)
                     
                     # Extract inline keyboard
                     bale_keyboard = self.extract_inline_keyboard(reply_markup) if reply_markup else None
                     
                     # Log activity
                     keyboard_info = f", {len(bale_keyboard['inline_keyboard'])} keyboard rows" if bale_keyboard else ""
-                    logger.info(f"Forwarding single photo: {len(links)} links{keyboard_info}")
+                    logger.info(f"Forwarding single photo: {link_count} links{keyboard_info}")
                     
                     # Send to Bale
-                    success = self.send_media_group_to_bale([photo_data], formatted_caption, bale_keyboard)
+                    success = self.send_media_group_to_bale([photo_data], formatted_caption, bale_keyboard, plain_caption)
                     
                     if success:
                         logger.info("Single photo forwarded successfully")
@@ -607,17 +808,35 @@ class TelegramChannelBaleForwarder:
         # Handle media groups
         if 'media_group_id' in message:
             group_id = message['media_group_id']
-            self.media_groups[group_id].append(message)
+            with self._media_group_lock:
+                self.media_groups.setdefault(group_id, []).append(message)
+                
+                # Only the first item of a group schedules the flush; later items just append
+                if group_id in self._media_group_deadlines:
+                    return
+                self._media_group_deadlines[group_id] = time.monotonic() + self.media_group_timeout
+                
+                # Set timer to process media group
+                timer = threading.Timer(self.media_group_timeout, self.process_media_group, args=(group_id,))
+                self._media_group_timers[group_id] = timer
             
-            # Set timer to process media group
-            threading.Timer(self.media_group_timeout, self.process_media_group, args=(group_id,)).start()
+            timer.start()
         else:
             # Handle single messages
-            threading.Thread(
-                target=self.process_single_message,
-                args=(message,),
-                daemon=True
-            ).start()
+            self._worker_pool.submit(self.process_single_message, message)
+
+    def _mark_update_seen(self, update_id: int):
+        """Remember dispatched update ID, evicting the oldest beyond the limit"""
+        self._seen_updates[update_id] = None
+        if len(self._seen_updates) > self.seen_updates_limit:
+            self._seen_updates.popitem(last=False)
+
+    def _backoff_after_error(self):
+        """Sleep with exponential backoff after consecutive polling errors"""
+        sleep_time = min(60, 1 << min(self._error_count, 6))
+        self._error_count += 1
+        logger.info(f"Retrying in {sleep_time} seconds")
+        time.sleep(sleep_time)
 
     def start_polling(self):
         """Start polling for updates"""
@@ -628,22 +847,43 @@ class TelegramChannelBaleForwarder:
             try:
                 updates = self.get_telegram_updates()
                 
-                for update in updates:
-                    self.last_update_id = update['update_id']
-                    self.process_telegram_update(update)
+                if updates is None:
+                    self._backoff_after_error()
+                    continue
+                
+                self._error_count = 0
                 
-                if not updates:
-                    time.sleep(1)
+                # Empty result means the long poll timed out; poll again immediately
+                for update in updates:
+                    update_id = update['update_id']
+                    
+                    # Skip updates Telegram re-delivers after they were already dispatched
+                    if update_id not in self._seen_updates:
+                        self.process_telegram_update(update)
+                        self._mark_update_seen(update_id)
+                    
+                    # Only acknowledge updates once they have been dispatched
+                    self.last_update_id = update_id
                     
             except KeyboardInterrupt:
                 logger.info("Stopping bot...")
                 break
             except Exception as e:
                 logger.error(f"Polling error: {e}")
-                time.sleep(5)
+                self._backoff_after_error()
         
         self.running = False
 
+    def _flush_pending_media_groups(self):
+        """Wait for scheduled media group flushes so albums are not lost on shutdown"""
+        with self._media_group_lock:
+            pending_timers = list(self._media_group_timers.values())
+        
+        if pending_timers:
+            logger.info(f"Waiting for {len(pending_timers)} pending media group(s) to be forwarded")
+        for timer in pending_timers:
+            timer.join()
+
     def run(self):
         """Main run method"""
         logger.info("Telegram Channel to Bale Forwarder v1.0")
@@ -651,9 +891,10 @@ class TelegramChannelBaleForwarder:
         
         try:
             # Test Telegram connection
-            telegram_response = requests.get(f"{self.telegram_base_url}/getMe", timeout=10)
-            if telegram_response.json().get('ok'):
-                telegram_bot_info = telegram_response.json().get('result', {})
+            telegram_response = self.tg_session.get(f"{self.telegram_base_url}/getMe", timeout=10)
+            telegram_result = _json_loads(telegram_response.content)
+            if telegram_result.get('ok'):
+                telegram_bot_info = telegram_result.get('result', {})
                 bot_name = telegram_bot_info.get('first_name', 'Unknown')
                 logger.info(f"Telegram API: Connected ({bot_name})")
             else:
@@ -668,8 +909,8 @@ class TelegramChannelBaleForwarder:
                 return
             
             # Test Bale connection
-            bale_response = requests.get(f"{self.bale_base_url}/getMe", timeout=10)
-            if bale_response.json().get('ok'):
+            bale_response = self.bale_session.get(f"{self.bale_base_url}/getMe", timeout=10)
+            if _json_loads(bale_response.content).get('ok'):
                 logger.info("Bale API: Connected")
             else:
                 logger.error("Bale API: Failed to connect")
@@ -684,6 +925,13 @@ class TelegramChannelBaleForwarder:
                 
         except Exception as e:
             logger.error(f"Failed to start bot: {e}")
+        finally:
+            self._flush_pending_media_groups()
+            self._worker_pool.shutdown(wait=False)
+            self._download_pool.shutdown(wait=False)
+            self.tg_session.close()
+            self.tg_poll_session.close()
+            self.bale_session.close()
 
 
 if __name__ == "__main__":